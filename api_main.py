@@ -1,13 +1,29 @@
-from flask import Flask, jsonify, request
-from flask_cors import CORS
+from fastapi import FastAPI, Query
+from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+import uvicorn
+import orjson
+import asyncpg
+import asyncio
 import os
 import bcrypt
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHash
+import hmac
+import hashlib
+import time
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 
-app = Flask(__name__)
-CORS(app)
+# orjson pour toutes les réponses (encodeur natif, datetime en ISO 8601)
+app = FastAPI(title="AIM Analytics API", default_response_class=ORJSONResponse)
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_methods=["*"],
+    allow_headers=["*"]
+)
 
 # Configuration PostgreSQL (la même que Streamlit)
 DB_CONFIG = {
@@ -15,121 +31,291 @@ DB_CONFIG = {
     "database": os.getenv("DB_NAME", "aim_platform"),
     "user": os.getenv("DB_USER", "aim_user"),
     "password": os.getenv("DB_PASSWORD", "aim_password"),
-    "port": os.getenv("DB_PORT", "5432")
+    "port": int(os.getenv("DB_PORT", "5432"))
 }
 
-def get_db_connection():
-    """Établir une connexion à la base de données"""
-    return psycopg2.connect(**DB_CONFIG)
+DB_POOL_MIN = 5
+DB_POOL_MAX = 20
 
-@app.route('/')
-def home():
-    return jsonify({"message": "AIM Analytics API", "status": "running"})
+# Processus uvicorn (chacun a son propre pool : API_WORKERS x DB_POOL_MAX connexions au maximum)
+API_WORKERS = int(os.getenv("WEB_CONCURRENCY", str(min(os.cpu_count() or 1, 4))))
 
-@app.route('/api/login', methods=['POST'])
-def login():
+# asyncpg prépare chaque requête une seule fois par connexion et garde le plan dans
+# son cache (clé = texte SQL, 100 entrées par défaut, largement assez pour les
+# quelques requêtes de l'API) : les requêtes chaudes sont des constantes pour
+# toujours réutiliser exactement le même texte.
+
+LOGIN_SQL = """
+    SELECT id, username, email, full_name, role, department,
+           is_active, is_first_login, created_at, last_login, password_hash
+    FROM users 
+    WHERE (username=$1 OR email=$1)
+    AND is_active=TRUE
+    ORDER BY (username=$1) DESC, id
+    LIMIT 1
+"""
+
+LAST_LOGIN_SQL = "UPDATE users SET last_login=$1 WHERE id=$2"
+
+REHASH_SQL = "UPDATE users SET password_hash=$1 WHERE id=$2"
+
+# Le hachage des mots de passe est volontairement coûteux en CPU : on l'exécute hors
+# de la boucle d'événements
+_PASSWORD_POOL = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Argon2id pour les nouveaux hash ; les anciens hash bcrypt sont migrés à la connexion
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # Kio
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "2"))
+
+_password_hasher = PasswordHasher(
+    time_cost=ARGON2_TIME_COST,
+    memory_cost=ARGON2_MEMORY_COST,
+    parallelism=ARGON2_PARALLELISM
+)
+
+# Hash factice vérifié quand l'utilisateur n'existe pas : même temps de réponse
+# que pour un mauvais mot de passe (pas d'énumération des comptes)
+_DUMMY_HASH = _password_hasher.hash("aim-dummy-password")
+
+def _verify_password(password, password_hash):
+    """Vérifie un mot de passe (Argon2id ou ancien hash bcrypt)"""
+    if password_hash.startswith('$2'):
+        return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    try:
+        return _password_hasher.verify(password_hash, password)
+    except (VerificationError, InvalidHash):
+        return False
+
+def _password_needs_rehash(password_hash):
+    """Indique si le hash doit être régénéré (ancien bcrypt ou paramètres modifiés)"""
+    return password_hash.startswith('$2') or _password_hasher.check_needs_rehash(password_hash)
+
+# Cache des identifiants déjà vérifiés : clé HMAC(username:password) -> (horodatage, hash validé)
+VERIFY_CACHE_TTL = 60  # secondes
+VERIFY_CACHE_MAX = 10000
+SERVER_SECRET = os.getenv("SERVER_SECRET", "").encode('utf-8') or os.urandom(32)
+_verify_cache = {}
+
+def _credential_key(username, password):
+    """Clé de cache des identifiants (le mot de passe n'est jamais conservé en clair)"""
+    return hmac.new(SERVER_SECRET, f"{username}:{password}".encode('utf-8'), hashlib.sha256).digest()
+
+@app.on_event("startup")
+async def startup_event():
+    """Créer le pool de connexions PostgreSQL (asyncpg)"""
+    app.state.pg = await asyncpg.create_pool(
+        min_size=DB_POOL_MIN,
+        max_size=DB_POOL_MAX,
+        **DB_CONFIG
+    )
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Fermer le pool de connexions"""
+    await app.state.pg.close()
+    _PASSWORD_POOL.shutdown(wait=False)
+
+# Pages /api/users pré-sérialisées, clé (after, limit) -> (horodatage, corps JSON)
+USERS_CACHE_TTL = 5  # secondes
+USERS_CACHE_MAX = 1000
+USERS_PAGE_DEFAULT = 200
+USERS_PAGE_MAX = 1000
+_users_cache = {}
+
+USERS_PAGE_SQL = """
+    SELECT id, username, email, full_name, role, 
+           is_active, created_at, last_login
+    FROM users
+    WHERE id > $1
+    ORDER BY id
+    LIMIT $2
+"""
+
+class LoginRequest(BaseModel):
+    username: str = ""
+    password: str = ""
+
+# Réponse de la page d'accueil, identique à chaque appel : sérialisée une seule fois
+_ROOT_JSON = orjson.dumps({"message": "AIM Analytics API", "status": "running"})
+
+@app.get('/')
+async def home():
+    return Response(content=_ROOT_JSON, media_type="application/json")
+
+@app.post('/api/login')
+async def login(credentials: LoginRequest):
     """Endpoint de connexion qui utilise la même DB que Streamlit"""
-    data = request.get_json()
-    username = data.get('username')
-    password = data.get('password')
+    username = credentials.username
+    password = credentials.password
     
     if not username or not password:
-        return jsonify({"error": "Username and password required"}), 400
-    
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+        return ORJSONResponse({"error": "Username and password required"}, status_code=400)
     
     try:
-        cursor.execute("""
-            SELECT * FROM users 
-            WHERE (username=%s OR email=%s) 
-            AND is_active=TRUE
-        """, (username, username))
-        user = cursor.fetchone()
+        # Connexion rendue au pool avant le hachage (coûteux en CPU) : des connexions
+        # lentes ne doivent pas bloquer /api/users ni /api/health sur acquire()
+        async with app.state.pg.acquire() as conn:
+            user = await conn.fetchrow(LOGIN_SQL, username)
         
         if not user:
-            return jsonify({"error": "User not found"}), 404
+            # Vérification factice pour un temps constant, puis même réponse qu'un mauvais mot de passe
+            await asyncio.get_running_loop().run_in_executor(
+                _PASSWORD_POOL, _verify_password, password, _DUMMY_HASH
+            )
+            return ORJSONResponse({"error": "Invalid credentials"}, status_code=401)
+        
+        user = dict(user)
+        
+        # Identifiants déjà vérifiés récemment avec ce même hash : pas de hachage
+        key = _credential_key(username, password)
+        cached = _verify_cache.get(key)
+        ok = (cached is not None
+              and time.monotonic() - cached[0] < VERIFY_CACHE_TTL
+              and hmac.compare_digest(cached[1], user['password_hash']))
+        
+        if not ok:
+            # Vérifier le mot de passe (dans le pool de threads)
+            loop = asyncio.get_running_loop()
+            ok = await loop.run_in_executor(
+                _PASSWORD_POOL,
+                _verify_password,
+                password,
+                user['password_hash']
+            )
+            if ok:
+                # Migration transparente des anciens hash vers Argon2id
+                if _password_needs_rehash(user['password_hash']):
+                    user['password_hash'] = await loop.run_in_executor(
+                        _PASSWORD_POOL, _password_hasher.hash, password
+                    )
+                    async with app.state.pg.acquire() as conn:
+                        await conn.execute(REHASH_SQL, user['password_hash'], user['id'])
+                
+                if len(_verify_cache) >= VERIFY_CACHE_MAX:
+                    _verify_cache.clear()
+                _verify_cache[key] = (time.monotonic(), user['password_hash'])
         
-        # Vérifier le mot de passe avec bcrypt
-        if bcrypt.checkpw(
-            password.encode('utf-8'),
-            user['password_hash'].encode('utf-8')
-        ):
+        if ok:
             # Mettre à jour last_login
-            cursor.execute("""
-                UPDATE users SET last_login=%s WHERE id=%s
-            """, (datetime.now(), user['id']))
-            conn.commit()
+            async with app.state.pg.acquire() as conn:
+                await conn.execute(LAST_LOGIN_SQL, datetime.now(), user['id'])
             
             # Retirer le hash du mot de passe pour la réponse
             user.pop('password_hash')
-            return jsonify({
+            return {
                 "success": True,
                 "user": user,
                 "message": "Login successful"
-            })
+            }
         else:
-            return jsonify({"error": "Invalid password"}), 401
-            
+            return ORJSONResponse({"error": "Invalid credentials"}, status_code=401)
+        
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
-
-@app.route('/api/users', methods=['GET'])
-def get_users():
-    """Récupérer tous les utilisateurs (pour admin)"""
-    conn = get_db_connection()
-    cursor = conn.cursor(cursor_factory=RealDictCursor)
+        return ORJSONResponse({"error": str(e)}, status_code=500)
+
+@app.get('/api/users')
+async def get_users(
+    after: int = 0,
+    limit: int = Query(USERS_PAGE_DEFAULT, ge=1, le=USERS_PAGE_MAX)
+):
+    """Récupérer les utilisateurs par pages (pagination par clé sur l'id, pour admin)"""
+    key = (after, limit)
+    cached = _users_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < USERS_CACHE_TTL:
+        return Response(content=cached[1], media_type="application/json")
     
     try:
-        cursor.execute("""
-            SELECT id, username, email, full_name, role, 
-                   is_active, created_at, last_login
-            FROM users
-            ORDER BY id
-        """)
-        users = cursor.fetchall()
-        return jsonify({"users": users})
+        async with app.state.pg.acquire() as conn:
+            users = await conn.fetch(USERS_PAGE_SQL, after, limit)
+        body = orjson.dumps({
+            "users": [dict(user) for user in users],
+            # Curseur de la page suivante (None quand la liste est terminée)
+            "next": users[-1]['id'] if len(users) == limit else None
+        })
+        if len(_users_cache) >= USERS_CACHE_MAX:
+            _users_cache.clear()
+        _users_cache[key] = (time.monotonic(), body)
+        return Response(content=body, media_type="application/json")
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
-    finally:
-        cursor.close()
-        conn.close()
+        return ORJSONResponse({"error": str(e)}, status_code=500)
+
+# Horodatage formaté, rafraîchi au plus une fois par seconde
+_ts_cache = {"t": 0.0, "s": ""}
 
-@app.route('/api/health', methods=['GET'])
-def health_check():
+def _current_timestamp():
+    """Horodatage ISO 8601 à la seconde près"""
+    now = time.time()
+    if now - _ts_cache["t"] >= 1.0:
+        _ts_cache["t"] = now
+        _ts_cache["s"] = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(now))
+    return _ts_cache["s"]
+
+# Résultat de la sonde DB mémorisé 1 seconde (les sondes de supervision sont fréquentes)
+HEALTH_CACHE_TTL = 1.0  # secondes
+_health_cache = {"t": 0.0, "error": None}
+
+_LIVE_JSON = orjson.dumps({"status": "alive"})
+
+async def _probe_database():
+    """Exécute SELECT 1 au plus une fois par seconde ; renvoie l'erreur éventuelle"""
+    now = time.monotonic()
+    if now - _health_cache["t"] >= HEALTH_CACHE_TTL:
+        try:
+            async with app.state.pg.acquire() as conn:
+                await conn.fetchval("SELECT 1")
+            _health_cache["error"] = None
+        except Exception as e:
+            _health_cache["error"] = str(e)
+        _health_cache["t"] = now
+    return _health_cache["error"]
+
+@app.get('/api/health/live')
+async def liveness_check():
+    """Vérifier que le processus répond (sans accès à la DB)"""
+    return Response(content=_LIVE_JSON, media_type="application/json")
+
+@app.get('/api/health')
+async def health_check():
     """Vérifier la santé de l'API et de la DB"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.close()
-        conn.close()
-        
-        return jsonify({
+    error = await _probe_database()
+    if error is None:
+        return {
             "status": "healthy",
             "database": "connected",
-            "timestamp": datetime.now().isoformat()
-        })
-    except Exception as e:
-        return jsonify({
-            "status": "unhealthy",
-            "database": "disconnected",
-            "error": str(e)
-        }), 500
+            "timestamp": _current_timestamp()
+        }
+    return ORJSONResponse({
+        "status": "unhealthy",
+        "database": "disconnected",
+        "error": error
+    }, status_code=500)
 
 if __name__ == '__main__':
     print("=" * 60)
     print("🚀 API AIM Analytics avec PostgreSQL")
     print("=" * 60)
     print("URL: http://127.0.0.1:5000")
+    print(f"Workers: {API_WORKERS}")
     print("\n📡 Endpoints:")
     print("  - GET  /              : Page d'accueil")
     print("  - POST /api/login     : Connexion")
-    print("  - GET  /api/users     : Liste des utilisateurs")
+    print("  - GET  /api/users     : Liste des utilisateurs (?after=&limit=)")
     print("  - GET  /api/health    : Vérification de santé")
+    print("  - GET  /api/health/live : Vérification de vie (sans DB)")
     print("=" * 60)
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    # Rechargement automatique uniquement en développement (DEV=1) ; pas de journal
+    # d'accès en production, uvicorn choisit uvloop/httptools s'ils sont installés.
+    # En production, équivalent gunicorn :
+    #   gunicorn api_main:app -k uvicorn.workers.UvicornWorker -w 4 --bind 0.0.0.0:5000 --log-level warning
+    dev_mode = bool(os.getenv("DEV"))
+    uvicorn.run(
+        "api_main:app",
+        host="0.0.0.0",
+        port=5000,
+        reload=dev_mode,
+        workers=1 if dev_mode else API_WORKERS,
+        access_log=False,
+        log_level="warning"
+    )
\ No newline at end of file
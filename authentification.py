@@ -1,4 +1,6 @@
 # auth.py
+import re
+from types import MappingProxyType
 import streamlit as st
 from api_utils import (
     page_bg_css, 
@@ -12,11 +14,18 @@ from api_utils import (
     check_first_login
 )
 
-def show_login_page():
-    """Affiche la page de connexion"""
-    st.markdown(page_bg_css(), unsafe_allow_html=True)
-    
-    st.markdown("""
+# Mot de passe "Fort" : au moins 8 caractères, une majuscule et un chiffre (un seul passage)
+_STRENGTH_RE = re.compile(r'(?=.*[A-Z])(?=.*\d).{8,}', re.DOTALL)
+
+# Page d'accueil de chaque rôle (table figée, construite une seule fois)
+_ROLE_PAGES = MappingProxyType({
+    'admin': "admin_dashboard",
+    'data_analyst': "analyst_dashboard",
+    'marketing': "marketing_dashboard"
+})
+
+# Blocs HTML statiques, construits une seule fois à l'import
+_LOGIN_HEADER_HTML = """
     <div class="login-container">
         <div style="text-align: center; margin-bottom: 40px;">
             <h1 style="color: #172B4D; margin-bottom: 10px;">🎯 AIM Platform</h1>
@@ -24,7 +33,66 @@ def show_login_page():
                 Analyse Marketing Intelligente
             </p>
         </div>
-    """, unsafe_allow_html=True)
+    """
+
+_LOGIN_FOOTER_HTML = """
+        <div style="text-align: center; margin-top: 60px; color: #6B7280; font-size: 0.9em;">
+            <hr style="border: none; height: 1px; background-color: #E5E7EB; margin: 20px 0;">
+            <p>
+                <strong>Première connexion ?</strong><br>
+                Demandez vos identifiants à l'administrateur système
+            </p>
+            <p style="font-size: 0.8em; margin-top: 10px;">
+                © 2024 AIM Platform • Version 2.0
+            </p>
+        </div>
+    """
+
+# Pied de page et fermeture du conteneur de connexion, en un seul bloc
+_LOGIN_PAGE_CLOSE_HTML = _LOGIN_FOOTER_HTML + "</div>"
+
+_FORCE_CHANGE_BANNER_HTML = """
+    <div style="text-align: center; padding: 30px 20px 40px;">
+        <div style="background: linear-gradient(135deg, #FF5630 0%, #FF7452 100%); 
+                    color: white; 
+                    padding: 25px; 
+                    border-radius: 12px;
+                    margin-bottom: 30px;
+                    box-shadow: 0 4px 12px rgba(255, 86, 48, 0.2);">
+            <h1 style="margin: 0;">🔒 Changement de mot de passe requis</h1>
+            <p style="font-size: 1.2em; margin-top: 10px;">
+                Pour des raisons de sécurité, vous devez modifier votre mot de passe temporaire.
+            </p>
+        </div>
+    </div>
+    """
+
+_FORCE_CHANGE_FOOTER_HTML = """
+    <div style="text-align: center; margin-top: 50px; padding: 20px; background-color: #F4F5F7; border-radius: 8px;">
+        <p style="color: #6B7280; font-size: 0.9em;">
+            <strong>Important :</strong> Votre session sera sécurisée après ce changement.<br>
+            Vous serez redirigé automatiquement vers votre tableau de bord.
+        </p>
+    </div>
+    """
+
+def _validate_and_score(password):
+    """Valide le mot de passe et calcule sa force en un seul appel
+    (résultat non mis en cache : pas de mot de passe en clair conservé en mémoire)"""
+    if _STRENGTH_RE.match(password):
+        strength, color = "Fort", "#36B37E"
+    elif len(password) >= 8:
+        strength, color = "Moyen", "#FFAB00"
+    else:
+        strength, color = "Faible", "#FF5630"
+    
+    is_valid, message = validate_password(password)
+    return is_valid, message, strength, color
+
+def show_login_page():
+    """Affiche la page de connexion"""
+    # CSS + en-tête statique envoyés en un seul message
+    st.markdown(page_bg_css() + _LOGIN_HEADER_HTML, unsafe_allow_html=True)
     
     with st.container():
         col1, col2, col3 = st.columns([1, 2, 1])
@@ -62,101 +130,61 @@ def show_login_page():
                 )
     
     if login_button:
+        # Validation des champs avant le spinner (pas de st.stop() dans le contexte du spinner)
+        if not identifier.strip():
+            st.error("❌ Veuillez saisir votre identifiant")
+            st.stop()
+        
+        if not password.strip():
+            st.error("❌ Veuillez saisir votre mot de passe")
+            st.stop()
+        
+        # Seule la vérification du hash (coûteuse) est sous spinner
         with st.spinner("Vérification de vos identifiants..."):
-            if not identifier.strip():
-                st.error("❌ Veuillez saisir votre identifiant")
-                st.stop()
+            success, user_data = check_credentials(identifier, password)
+        
+        if success:
+            # Nouvel état de session construit localement puis écrit en une fois
+            new_state = {
+                'logged_in': True,
+                'username': user_data['username'],
+                'user_info': user_data,
+                'user_role': user_data['role'],
+                'login_time': st.session_state.get('login_time', st.session_state.get('_last_report_step', '')),
+                # Déterminer la page de destination
+                'current_page': _ROLE_PAGES.get(user_data['role'], "marketing_dashboard")
+            }
             
-            if not password.strip():
-                st.error("❌ Veuillez saisir votre mot de passe")
-                st.stop()
+            # Vérifier si changement de mot de passe obligatoire (la page dédiée affiche le bandeau)
+            if not user_data.get('password_changed', True):
+                new_state['force_password_change'] = True
             
-            success, user_data = check_credentials(identifier, password)
+            st.session_state.update(new_state)
             
-            if success:
-                # Mettre à jour la session
-                st.session_state.update({
-                    'logged_in': True,
-                    'username': user_data['username'],
-                    'user_info': user_data,
-                    'user_role': user_data['role'],
-                    'login_time': st.session_state.get('login_time', st.session_state.get('_last_report_step', ''))
-                })
-                
-                # Vérifier si changement de mot de passe obligatoire
-                if not user_data.get('password_changed', True):
-                    st.session_state['force_password_change'] = True
-                    st.info("🔒 Un changement de mot de passe est requis pour continuer")
-                
-                # Déterminer la page de destination
-                role_pages = {
-                    'admin': "admin_dashboard",
-                    'data_analyst': "analyst_dashboard",
-                    'marketing': "marketing_dashboard"
-                }
-                
-                st.session_state['current_page'] = role_pages.get(
-                    user_data['role'], 
-                    "marketing_dashboard"
-                )
-                
-                st.success(f"✅ Connexion réussie ! Bienvenue {user_data.get('full_name', user_data['username'])}")
-                
-                # Petit délai pour afficher le message de succès
-                import time
-                time.sleep(1)
-                st.rerun()
-            else:
-                st.error("🔐 Identifiant ou mot de passe incorrect")
+            st.toast(f"Connexion réussie ! Bienvenue {user_data.get('full_name', user_data['username'])}", icon="✅")
+            st.rerun()
+        else:
+            st.error("🔐 Identifiant ou mot de passe incorrect")
+            
+            # Suggestions d'aide
+            with st.expander("Besoin d'aide ?"):
+                st.markdown("""
+                **Problèmes courants :**
+                - Vérifiez la casse (majuscules/minuscules)
+                - Vérifiez les espaces avant/après
+                - Assurez-vous que votre compte est actif
                 
-                # Suggestions d'aide
-                with st.expander("Besoin d'aide ?"):
-                    st.markdown("""
-                    **Problèmes courants :**
-                    - Vérifiez la casse (majuscules/minuscules)
-                    - Vérifiez les espaces avant/après
-                    - Assurez-vous que votre compte est actif
-                    
-                    **Contact :**
-                    - Administrateur système : admin@entreprise.com
-                    - Support : support@entreprise.com
-                    """)
+                **Contact :**
+                - Administrateur système : admin@entreprise.com
+                - Support : support@entreprise.com
+                """)
     
     # Pied de page
-    st.markdown("""
-        <div style="text-align: center; margin-top: 60px; color: #6B7280; font-size: 0.9em;">
-            <hr style="border: none; height: 1px; background-color: #E5E7EB; margin: 20px 0;">
-            <p>
-                <strong>Première connexion ?</strong><br>
-                Demandez vos identifiants à l'administrateur système
-            </p>
-            <p style="font-size: 0.8em; margin-top: 10px;">
-                © 2024 AIM Platform • Version 2.0
-            </p>
-        </div>
-    """, unsafe_allow_html=True)
-    
-    st.markdown("</div>", unsafe_allow_html=True)
+    st.markdown(_LOGIN_PAGE_CLOSE_HTML, unsafe_allow_html=True)
 
 def show_force_password_change():
     """Affiche la page de changement obligatoire de mot de passe"""
-    st.markdown(page_bg_css(), unsafe_allow_html=True)
-    
-    st.markdown("""
-    <div style="text-align: center; padding: 30px 20px 40px;">
-        <div style="background: linear-gradient(135deg, #FF5630 0%, #FF7452 100%); 
-                    color: white; 
-                    padding: 25px; 
-                    border-radius: 12px;
-                    margin-bottom: 30px;
-                    box-shadow: 0 4px 12px rgba(255, 86, 48, 0.2);">
-            <h1 style="margin: 0;">🔒 Changement de mot de passe requis</h1>
-            <p style="font-size: 1.2em; margin-top: 10px;">
-                Pour des raisons de sécurité, vous devez modifier votre mot de passe temporaire.
-            </p>
-        </div>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(page_bg_css() + _FORCE_CHANGE_BANNER_HTML, unsafe_allow_html=True)
     
     # Instructions
     with st.expander("📋 Instructions de sécurité", expanded=True):
@@ -197,18 +225,10 @@ def show_force_password_change():
                     help="Doit respecter les exigences de sécurité ci-dessus"
                 )
                 
-                # Indicateur de force du mot de passe
-                if new_password:
-                    strength = "Faible"
-                    color = "#FF5630"
-                    
-                    if len(new_password) >= 8:
-                        if any(c.isupper() for c in new_password) and any(c.isdigit() for c in new_password):
-                            strength = "Fort"
-                            color = "#36B37E"
-                        else:
-                            strength = "Moyen"
-                            color = "#FFAB00"
+                # Indicateur de force du mot de passe (calculé une fois, réutilisé à la validation)
+                pw_check = _validate_and_score(new_password) if new_password else None
+                if pw_check:
+                    _, _, strength, color = pw_check
                     
                     st.markdown(
                         f'<p style="font-size: 0.9em; color: {color}; margin-top: -10px;">'
@@ -248,10 +268,10 @@ def show_force_password_change():
                         st.error("❌ Les mots de passe ne correspondent pas")
                         st.stop()
                     
-                    # Validation de la force du mot de passe
-                    validation_result = validate_password(new_password)
-                    if not validation_result[0]:
-                        st.error(f"❌ {validation_result[1]}")
+                    # Validation de la force du mot de passe (résultat déjà calculé ci-dessus)
+                    is_valid, validation_message, _, _ = pw_check
+                    if not is_valid:
+                        st.error(f"❌ {validation_message}")
                         st.stop()
                     
                     # Vérification que le nouveau mot de passe est différent de l'ancien
@@ -267,16 +287,13 @@ def show_force_password_change():
                     )
                     
                     if success:
-                        st.success("✅ Mot de passe changé avec succès !")
-                        st.balloons()
+                        st.toast("Mot de passe changé avec succès !", icon="✅")
                         
                         # Mettre à jour la session
                         st.session_state.force_password_change = False
                         st.session_state.user_info['password_changed'] = True
                         
-                        # Redirection après succès
-                        import time
-                        time.sleep(2)
+                        # Redirection immédiate
                         st.rerun()
                     else:
                         st.error(f"❌ Échec du changement : {message}")
@@ -292,23 +309,16 @@ def show_force_password_change():
                                 """)
     
     # Message de pied de page
-    st.markdown("""
-    <div style="text-align: center; margin-top: 50px; padding: 20px; background-color: #F4F5F7; border-radius: 8px;">
-        <p style="color: #6B7280; font-size: 0.9em;">
-            <strong>Important :</strong> Votre session sera sécurisée après ce changement.<br>
-            Vous serez redirigé automatiquement vers votre tableau de bord.
-        </p>
-    </div>
-    """, unsafe_allow_html=True)
+    st.markdown(_FORCE_CHANGE_FOOTER_HTML, unsafe_allow_html=True)
 
 # Fonction supplémentaire pour la déconnexion
 def logout_user():
     """Déconnecte l'utilisateur et nettoie la session"""
     keys_to_keep = ['_last_report_step']  # Conserver certaines clés si nécessaire
     
-    for key in list(st.session_state.keys()):
-        if key not in keys_to_keep:
-            del st.session_state[key]
+    preserved = {key: st.session_state[key] for key in keys_to_keep if key in st.session_state}
+    st.session_state.clear()
+    st.session_state.update(preserved)
     
     st.session_state['logged_in'] = False
     st.session_state['current_page'] = "login"
@@ -1,34 +1,52 @@
 # create_admin.py
-import bcrypt
+from argon2 import PasswordHasher
 import getpass
+import os
+import psycopg2
+from config import DB_CONFIG
+
+# Mêmes paramètres Argon2id (et mêmes variables d'environnement) que l'application
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # Kio
+ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "2"))
 
 def create_admin_password():
-    """Génère un hash bcrypt pour l'admin"""
+    """Génère un hash Argon2id pour l'admin"""
     print("Création du mot de passe admin")
-    password = getpass.getpass("Entrez le mot de passe pour l'admin: ")
+    try:
+        password = getpass.getpass("Entrez le mot de passe pour l'admin: ")
+        if not password:
+            print("❌ Le mot de passe ne peut pas être vide, aucune modification effectuée")
+            return
+        confirmation = getpass.getpass("Confirmez le mot de passe: ")
+    except (KeyboardInterrupt, EOFError):
+        print("\n❌ Saisie annulée, aucune modification effectuée")
+        return
+    
+    if password != confirmation:
+        print("❌ Les mots de passe ne correspondent pas, aucune modification effectuée")
+        return
     
     # Générer le hash
-    salt = bcrypt.gensalt()
-    hashed_password = bcrypt.hashpw(password.encode(), salt)
+    hasher = PasswordHasher(
+        time_cost=ARGON2_TIME_COST,
+        memory_cost=ARGON2_MEMORY_COST,
+        parallelism=ARGON2_PARALLELISM
+    )
+    hashed_password = hasher.hash(password)
     
-    print(f"\nHash bcrypt généré:")
-    print(f"{hashed_password.decode()}")
+    print(f"\nHash Argon2id généré:")
+    print(f"{hashed_password}")
     
-    # Mettre à jour la base de données
-    import psycopg2
-    conn = psycopg2.connect(
-        host="localhost",
-        database="aim_platform",
-        user="aim_user",
-        password="aim_password"
-    )
+    # Mettre à jour la base de données (mêmes paramètres que l'application, via config.py)
+    conn = psycopg2.connect(**DB_CONFIG)
     
     cursor = conn.cursor()
     cursor.execute("""
         UPDATE users 
         SET password_hash = %s 
         WHERE username = 'admin'
-    """, (hashed_password.decode(),))
+    """, (hashed_password,))
     
     conn.commit()
     cursor.close()
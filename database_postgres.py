@@ -2,7 +2,23 @@
 import psycopg2
 from psycopg2.extras import RealDictCursor
 import hashlib
+import hmac
+import os
+import base64
+import binascii
 from datetime import datetime
+from types import MappingProxyType
+
+# Paramètres scrypt (hash stocké sous la forme "scrypt$<sel base64>$<hash base64>")
+SCRYPT_N = 2 ** 14
+SCRYPT_R = 8
+SCRYPT_P = 1
+SCRYPT_DKLEN = 32
+SCRYPT_SALT_SIZE = 16
+SCRYPT_PREFIX = 'scrypt$'
+
+# Couleur d'avatar par rôle
+ROLE_COLORS = MappingProxyType({'admin': '#FF5630', 'marketing': '#36B37E', 'analyst': '#6554C0'})
 
 class PostgresDatabase:
     def __init__(self):
@@ -19,13 +35,45 @@ class PostgresDatabase:
         """Établir la connexion"""
         return psycopg2.connect(**self.conn_params, cursor_factory=RealDictCursor)
     
+    def _scrypt(self, password, salt):
+        """Dériver la clé scrypt d'un mot de passe"""
+        return hashlib.scrypt(
+            password.encode('utf-8'), salt=salt,
+            n=SCRYPT_N, r=SCRYPT_R, p=SCRYPT_P, dklen=SCRYPT_DKLEN
+        )
+    
     def hash_password(self, password):
-        """Hasher un mot de passe"""
-        return hashlib.sha256(password.encode()).hexdigest()
+        """Hasher un mot de passe (scrypt avec sel aléatoire par utilisateur)"""
+        salt = os.urandom(SCRYPT_SALT_SIZE)
+        digest = self._scrypt(password, salt)
+        return SCRYPT_PREFIX + base64.b64encode(salt).decode() + '$' + base64.b64encode(digest).decode()
+    
+    def _legacy_hash_password(self, password):
+        """Ancien format : SHA-256 sans sel (empreinte brute de 32 octets)"""
+        return hashlib.sha256(password.encode('utf-8')).digest()
+    
+    def needs_rehash(self, hashed):
+        """Indique si le hash est encore à l'ancien format SHA-256"""
+        return not (hashed or '').startswith(SCRYPT_PREFIX)
     
     def verify_password(self, password, hashed):
-        """Vérifier un mot de passe"""
-        return self.hash_password(password) == hashed
+        """Vérifier un mot de passe (comparaison en temps constant)"""
+        if not hashed:
+            return False
+        if hashed.startswith(SCRYPT_PREFIX):
+            try:
+                salt_b64, digest_b64 = hashed[len(SCRYPT_PREFIX):].split('$')
+                salt = base64.b64decode(salt_b64)
+                expected = base64.b64decode(digest_b64)
+            except (ValueError, binascii.Error):
+                return False
+            return hmac.compare_digest(self._scrypt(password, salt), expected)
+        # Ancien hash stocké en hexadécimal : comparaison sur les 32 octets bruts
+        try:
+            expected = bytes.fromhex(hashed)
+        except ValueError:
+            return False
+        return hmac.compare_digest(self._legacy_hash_password(password), expected)
     
     def authenticate_user(self, username, password):
         """Authentifier un utilisateur"""
@@ -43,7 +91,10 @@ class PostgresDatabase:
             
             if user:
                 # Vérifier le mot de passe
-                if user['password'] == self.hash_password(password) and user['status'] == 'active':
+                if user['status'] == 'active' and self.verify_password(password, user['password']):
+                    # Migrer les anciens hash SHA-256 vers scrypt
+                    if self.needs_rehash(user['password']):
+                        self.update_password_hash(user['id'], password)
                     # Mettre à jour la dernière connexion
                     self.update_last_login(user['id'])
                     return {
@@ -71,13 +122,28 @@ class PostgresDatabase:
         except Exception as e:
             print(f"Erreur update_last_login: {e}")
     
+    def update_password_hash(self, user_id, password):
+        """Réécrire le hash d'un mot de passe au format scrypt"""
+        try:
+            conn = self.get_connection()
+            cursor = conn.cursor()
+            cursor.execute('UPDATE users SET password = %s WHERE id = %s', (self.hash_password(password), user_id))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            print(f"Erreur update_password_hash: {e}")
+    
     def get_users(self, filters=None):
         """Récupérer les utilisateurs"""
         try:
             conn = self.get_connection()
             cursor = conn.cursor()
             
-            query = 'SELECT * FROM users ORDER BY created_at DESC'
+            query = '''
+            SELECT id, username, email, full_name, role, department, status,
+                   created_at, last_login, avatar_color
+            FROM users ORDER BY created_at DESC
+            '''
             cursor.execute(query)
             users = cursor.fetchall()
             conn.close()
@@ -129,8 +195,7 @@ class PostgresDatabase:
     
     def get_role_color(self, role):
         """Couleur par rôle"""
-        colors = {'admin': '#FF5630', 'marketing': '#36B37E', 'analyst': '#6554C0'}
-        return colors.get(role, '#6B7280')
+        return ROLE_COLORS.get(role, '#6B7280')
     
     def get_user_stats(self):
         """Statistiques des utilisateurs"""
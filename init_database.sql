@@ -70,11 +70,13 @@ VALUES (
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
 CREATE INDEX IF NOT EXISTS idx_users_status ON users(status);
 CREATE INDEX IF NOT EXISTS idx_users_username ON users(username);
+CREATE INDEX IF NOT EXISTS idx_users_created ON users(created_at);
 CREATE INDEX IF NOT EXISTS idx_reviews_sentiment ON reviews(sentiment);
 CREATE INDEX IF NOT EXISTS idx_reviews_fake ON reviews(is_fake);
 CREATE INDEX IF NOT EXISTS idx_reviews_user ON reviews(user_id);
 CREATE INDEX IF NOT EXISTS idx_activities_user ON activities(user_id);
 CREATE INDEX IF NOT EXISTS idx_activities_type ON activities(activity_type);
+CREATE INDEX IF NOT EXISTS idx_activities_created ON activities(created_at);
 CREATE INDEX IF NOT EXISTS idx_analyses_user ON analyses(user_id);
 CREATE INDEX IF NOT EXISTS idx_analyses_status ON analyses(status);
 
@@ -238,39 +238,33 @@ def afficher_rapport_personnes(data, name_col, text_col):
     st.markdown("### 📤 Export des Données")
     
     if st.button("Générer le rapport complet", type="primary"):
-        # Créer un rapport synthétique
-        report_data = []
+        # Rapport synthétique : agrégats par personne en un seul groupby
+        # (100 premières personnes dans l'ordre d'apparition, comme avant)
+        groupes = data.groupby(name_col, sort=False, dropna=False)
+        report_df = groupes.size().head(100).rename('Nombre_avis').to_frame()
+        personnes = report_df.index
         
-        for person in data[name_col].unique()[:100]:  # Limiter pour la performance
-            person_reviews = data[data[name_col] == person]
-            
-            stats = {
-                'Personne': person,
-                'Nombre_avis': len(person_reviews),
-            }
-            
-            if 'date' in data.columns:
-                try:
-                    dates = pd.to_datetime(person_reviews['date'])
-                    stats['Date_premier'] = dates.min().strftime('%Y-%m-%d') if not pd.isna(dates.min()) else 'N/A'
-                    stats['Date_dernier'] = dates.max().strftime('%Y-%m-%d') if not pd.isna(dates.max()) else 'N/A'
-                except:
-                    stats['Date_premier'] = 'N/A'
-                    stats['Date_dernier'] = 'N/A'
-            
-            if 'sentiment' in data.columns:
-                sentiments = person_reviews['sentiment'].value_counts()
-                stats['Avis_positifs'] = sentiments.get('positif', 0)
-                stats['Avis_negatifs'] = sentiments.get('négatif', 0)
-                stats['Avis_neutres'] = sentiments.get('neutre', 0)
-            
-            if 'faux_avis' in data.columns:
-                stats['Faux_avis'] = person_reviews['faux_avis'].sum()
-                stats['Statut'] = 'Suspect' if stats['Faux_avis'] > 0 else 'Normal'
-            
-            report_data.append(stats)
+        if 'date' in data.columns:
+            try:
+                dates = pd.to_datetime(data['date'], errors='coerce').groupby(data[name_col], sort=False, dropna=False)
+                report_df['Date_premier'] = dates.min().reindex(personnes).dt.strftime('%Y-%m-%d').fillna('N/A')
+                report_df['Date_dernier'] = dates.max().reindex(personnes).dt.strftime('%Y-%m-%d').fillna('N/A')
+            except:
+                report_df['Date_premier'] = 'N/A'
+                report_df['Date_dernier'] = 'N/A'
+        
+        if 'sentiment' in data.columns:
+            sentiments = groupes['sentiment'].value_counts().unstack(fill_value=0)
+            sentiments = sentiments.reindex(index=personnes, columns=['positif', 'négatif', 'neutre'], fill_value=0)
+            report_df['Avis_positifs'] = sentiments['positif']
+            report_df['Avis_negatifs'] = sentiments['négatif']
+            report_df['Avis_neutres'] = sentiments['neutre']
+        
+        if 'faux_avis' in data.columns:
+            report_df['Faux_avis'] = groupes['faux_avis'].sum().reindex(personnes)
+            report_df['Statut'] = (report_df['Faux_avis'] > 0).map({True: 'Suspect', False: 'Normal'})
         
-        report_df = pd.DataFrame(report_data)
+        report_df = report_df.rename_axis('Personne').reset_index()
         
         # Trier par nombre d'avis
         report_df = report_df.sort_values('Nombre_avis', ascending=False)
@@ -6,6 +6,8 @@ import os
 import psycopg2
 from psycopg2 import pool
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHash
 import pandas as pd
 import numpy as np
 import plotly.express as px
@@ -19,6 +21,10 @@ from langdetect import detect
 from collections import Counter
 import warnings
 import urllib.parse
+from types import MappingProxyType
+import queue
+import threading
+import atexit
 warnings.filterwarnings('ignore')
 
 # Gestion des imports optionnels
@@ -28,6 +34,12 @@ try:
 except ImportError:
     TEXTBLOB_AVAILABLE = False
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # ==================================
 #    CONFIGURATION STREAMLIT
 # ==================================
@@ -40,7 +52,8 @@ st.set_page_config(
 
 # Configuration
 class Config:
-    COLORS = {
+    # Tables de couleurs en lecture seule
+    COLORS = MappingProxyType({
         'primary': '#6554C0',
         'secondary': '#36B37E',
         'accent': '#FFAB00',
@@ -48,24 +61,47 @@ class Config:
         'info': '#00B8D9',
         'dark': '#172B4D',
         'light': '#6B7280'
-    }
+    })
     
-    SENTIMENT_COLORS = {
+    SENTIMENT_COLORS = MappingProxyType({
         'positif': '#55C592',
         'négatif': '#FA5771',
         'neutre': '#F1C24D',
         'sarcastique': '#83C9FF'
-    }
+    })
     
     MAX_FILE_SIZE_MB = 100
     MAX_LOGIN_ATTEMPTS = 5
     
+    # Hachage Argon2id des mots de passe (les anciens hash bcrypt restent acceptés)
+    ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", "3"))
+    ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", "65536"))  # Kio
+    ARGON2_PARALLELISM = int(os.getenv("ARGON2_PARALLELISM", "2"))
+    
     DB_POOL_MIN = 1
     DB_POOL_MAX = 5
+    
+    # Écriture groupée des logs d'activité
+    ACTIVITY_BATCH_SIZE = 100
+    ACTIVITY_FLUSH_INTERVAL = 0.5  # secondes
+    ACTIVITY_QUEUE_MAX = 10000  # au-delà, les nouvelles activités sont ignorées
+    ACTIVITY_RETRY_DELAY = 1.0  # secondes, attente quand le pool n'a plus de connexion
+    
+    # Cache mémoire des utilisateurs (par ID et liste complète). Il vit dans chaque
+    # processus : une modification faite par un autre processus Streamlit ou par l'API
+    # n'y est visible qu'après expiration, soit jusqu'à USER_CACHE_TTL secondes de retard.
+    USER_CACHE_TTL = 60  # secondes
+    USER_CACHE_MAX = 10000
 
 # =======================================
 #      GESTION DE LA BASE DE DONNÉES
 # =======================================
+_password_hasher = PasswordHasher(
+    time_cost=Config.ARGON2_TIME_COST,
+    memory_cost=Config.ARGON2_MEMORY_COST,
+    parallelism=Config.ARGON2_PARALLELISM
+)
+
 @st.cache_resource
 def get_database_manager():
     return DatabaseManager()
@@ -73,6 +109,17 @@ def get_database_manager():
 class DatabaseManager:
     def __init__(self):
         self.connection_pool = None
+        self._activity_queue = queue.Queue(maxsize=Config.ACTIVITY_QUEUE_MAX)
+        self._activity_writer = None
+        self._pending_activity = []  # lot retiré de la file mais pas encore écrit
+        self._activity_lock = threading.Lock()
+        self._user_cache = {}
+        self._all_users_cache = None
+        self._user_cache_lock = threading.Lock()
+        # Hash factice vérifié pour un utilisateur inconnu : même temps de réponse qu'un
+        # mauvais mot de passe (pas d'énumération des comptes). Calculé une seule fois
+        # ici, le DatabaseManager étant mis en cache par get_database_manager.
+        self._dummy_password_hash = _password_hasher.hash("aim-dummy-password")
         self._initialize_database()
     
     def _initialize_database(self):
@@ -84,8 +131,8 @@ class DatabaseManager:
             if not db_params:
                 return
             
-            # Création du pool de connexions
-            self.connection_pool = psycopg2.pool.SimpleConnectionPool(
+            # Création du pool de connexions (partagé entre les sessions et le thread d'écriture)
+            self.connection_pool = psycopg2.pool.ThreadedConnectionPool(
                 Config.DB_POOL_MIN,
                 Config.DB_POOL_MAX,
                 **db_params
@@ -103,6 +150,8 @@ class DatabaseManager:
                 finally:
                     self.return_connection(conn)
                 
+                self._start_activity_writer()
+                
         except Exception as e:
             print(f"Erreur DB initialisation: {str(e)}")
     
@@ -115,11 +164,11 @@ class DatabaseManager:
                 return None
         return None
     
-    def return_connection(self, conn):
-        """Retourne une connexion au pool"""
+    def return_connection(self, conn, close=False):
+        """Retourne une connexion au pool (close=True pour une connexion devenue inutilisable)"""
         if self.connection_pool and conn:
             try:
-                self.connection_pool.putconn(conn)
+                self.connection_pool.putconn(conn, close=close)
             except:
                 pass
     
@@ -315,6 +364,14 @@ class DatabaseManager:
         )
     """)
             
+            # Index pour les requêtes fréquentes (connexion, logs, statistiques)
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_users_email ON users(email)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_activity_logs_created ON activity_logs(created_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_activity_logs_user_created ON activity_logs(user_id, created_at)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_data_uploads_upload_time ON data_uploads(upload_time)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_marketing_data_date ON marketing_data(date)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_user_sessions_user ON user_sessions(user_id)")
+            
             conn.commit()
             
         except Exception as e:
@@ -399,6 +456,7 @@ class DatabaseManager:
             # Supprimer l'utilisateur
             cursor.execute("DELETE FROM users WHERE id = %s", (user_id_int,))
             conn.commit()
+            self._invalidate_user_cache(user_id_int)
             
             return True, "Utilisateur supprimé avec succès"
             
@@ -410,8 +468,25 @@ class DatabaseManager:
             cursor.close()
             self.return_connection(conn)
         
+    def _hash_password(self, password):
+        """Hache un mot de passe avec Argon2id"""
+        return _password_hasher.hash(password)
+    
+    def _verify_password(self, password, password_hash):
+        """Vérifie un mot de passe (Argon2id ou ancien hash bcrypt)"""
+        if password_hash.startswith('$2'):
+            return bcrypt.checkpw(password.encode(), password_hash.encode())
+        try:
+            return _password_hasher.verify(password_hash, password)
+        except (VerificationError, InvalidHash):
+            return False
+    
+    def _password_needs_rehash(self, password_hash):
+        """Indique si le hash doit être régénéré (ancien bcrypt ou paramètres modifiés)"""
+        return password_hash.startswith('$2') or _password_hasher.check_needs_rehash(password_hash)
+    
     def authenticate_user(self, username, password):
-        """Authentifie un utilisateur avec bcrypt"""
+        """Authentifie un utilisateur (Argon2id, migration transparente des hash bcrypt)"""
         if not self.connection_pool:
             return None
         
@@ -444,11 +519,19 @@ class DatabaseManager:
                     'last_login': user[9]
                 }
                 
-                if bcrypt.checkpw(password.encode(), user_dict['password_hash'].encode()):
+                if self._verify_password(password, user_dict['password_hash']):
+                    if self._password_needs_rehash(user_dict['password_hash']):
+                        cursor.execute(
+                            "UPDATE users SET password_hash = %s WHERE id = %s",
+                            (self._hash_password(password), user_dict['id'])
+                        )
                     cursor.execute("UPDATE users SET last_login = NOW() WHERE id = %s", (user_dict['id'],))
                     conn.commit()
+                    self._invalidate_user_cache(user_dict['id'])
                     del user_dict['password_hash']
                     return user_dict
+            else:
+                self._verify_password(password, self._dummy_password_hash)
             
             return None
             
@@ -470,13 +553,14 @@ class DatabaseManager:
         
         cursor = conn.cursor()
         try:
-            hashed = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+            hashed = self._hash_password(new_password)
             cursor.execute("""
                 UPDATE users 
                 SET password_hash = %s, is_first_login = false, last_login = NOW()
                 WHERE id = %s
             """, (hashed, user_id))
             conn.commit()
+            self._invalidate_user_cache(user_id)
             return cursor.rowcount > 0
             
         except Exception as e:
@@ -500,13 +584,14 @@ class DatabaseManager:
         
         cursor = conn.cursor()
         try:
-            hashed = bcrypt.hashpw(new_password.encode(), bcrypt.gensalt()).decode()
+            hashed = self._hash_password(new_password)
             cursor.execute("""
                 UPDATE users 
                 SET password_hash = %s, is_first_login = true, last_login = NOW()
                 WHERE id = %s
             """, (hashed, user_id))
             conn.commit()
+            self._invalidate_user_cache(user_id)
             return cursor.rowcount > 0
             
         except Exception as e:
@@ -541,7 +626,7 @@ class DatabaseManager:
                 updates.append("department = %s")
                 params.append(kwargs['department'])
             if 'password' in kwargs:
-                hashed = bcrypt.hashpw(kwargs['password'].encode(), bcrypt.gensalt()).decode()
+                hashed = self._hash_password(kwargs['password'])
                 updates.append("password_hash = %s")
                 params.append(hashed)
             
@@ -550,6 +635,7 @@ class DatabaseManager:
                 query = f"UPDATE users SET {', '.join(updates)} WHERE id = %s"
                 cursor.execute(query, tuple(params))
                 conn.commit()
+                self._invalidate_user_cache(user_id)
             
             return True
         except:
@@ -560,26 +646,123 @@ class DatabaseManager:
             self.return_connection(conn)
 
     def log_activity(self, user_id, activity_type, description, ip_address="127.0.0.1"):
-        """Log une activité"""
+        """Log une activité (mise en file, écrite par lot en arrière-plan)"""
         if not self.connection_pool:
             return
         
+        try:
+            self._activity_queue.put_nowait((user_id, activity_type, description, ip_address))
+        except queue.Full:
+            print(f"File des logs d'activité pleine, activité ignorée: {activity_type}")
+
+    def _start_activity_writer(self):
+        """Démarre le thread qui écrit les logs d'activité par lots"""
+        if self._activity_writer is not None:
+            return
+        
+        self._activity_writer = threading.Thread(
+            target=self._activity_writer_loop,
+            name="activity-log-writer",
+            daemon=True
+        )
+        self._activity_writer.start()
+        atexit.register(self.flush_activity_logs)
+
+    def _activity_writer_loop(self):
+        """Regroupe les activités en file et les insère en une transaction"""
+        while True:
+            try:
+                self._collect_activity_batch()
+                
+                # Pas de connexion disponible (pool saturé, base redémarrée) : on garde
+                # le lot et on réessaie plutôt que de le perdre
+                while not self._write_pending_activity_logs():
+                    time.sleep(Config.ACTIVITY_RETRY_DELAY)
+            except Exception as e:
+                # Le thread ne doit jamais s'arrêter, sinon plus aucune activité n'est écrite
+                print(f"Erreur thread logs d'activité: {e}")
+                time.sleep(Config.ACTIVITY_RETRY_DELAY)
+
+    def _collect_activity_batch(self):
+        """Attend une activité puis complète le lot en attente pendant ACTIVITY_FLUSH_INTERVAL"""
+        row = self._activity_queue.get()
+        with self._activity_lock:
+            self._pending_activity.append(row)
+        deadline = time.monotonic() + Config.ACTIVITY_FLUSH_INTERVAL
+        
+        while len(self._pending_activity) < Config.ACTIVITY_BATCH_SIZE:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                row = self._activity_queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            with self._activity_lock:
+                self._pending_activity.append(row)
+
+    def _write_pending_activity_logs(self):
+        """Écrit le lot en attente (False si aucune connexion n'est disponible)"""
+        with self._activity_lock:
+            if not self._pending_activity:
+                return True
+            if not self._write_activity_logs(self._pending_activity):
+                return False
+            self._pending_activity = []
+            return True
+
+    def flush_activity_logs(self):
+        """Écrit immédiatement le lot en cours et les activités encore en file"""
+        with self._activity_lock:
+            while True:
+                try:
+                    self._pending_activity.append(self._activity_queue.get_nowait())
+                except queue.Empty:
+                    break
+        
+        # Un nouvel essai si le pool n'a plus de connexion libre au moment de l'arrêt
+        for attempt in range(2):
+            if self._write_pending_activity_logs():
+                return
+            time.sleep(Config.ACTIVITY_RETRY_DELAY)
+        print(f"{len(self._pending_activity)} logs d'activité non écrits (aucune connexion disponible)")
+
+    def _write_activity_logs(self, rows):
+        """Insère un lot d'activités (False si aucune connexion utilisable n'est disponible)"""
         conn = self.get_connection()
         if not conn:
-            return
+            return False
         
-        cursor = conn.cursor()
+        insert_sql = """
+            INSERT INTO activity_logs (user_id, activity_type, description, ip_address)
+            VALUES (%s, %s, %s, %s)
+        """
+        broken = False
         try:
-            cursor.execute("""
-                INSERT INTO activity_logs (user_id, activity_type, description, ip_address)
-                VALUES (%s, %s, %s, %s)
-            """, (user_id, activity_type, description, ip_address))
+            with conn.cursor() as cursor:
+                cursor.executemany(insert_sql, rows)
             conn.commit()
-        except:
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            # Connexion perdue : le lot est gardé et réessayé avec une autre connexion
+            print(f"Erreur connexion logs d'activité: {e}")
+            broken = True
+            return False
+        except Exception as e:
+            # Une ligne invalide (ex. utilisateur supprimé entre-temps) annule tout le lot :
+            # on réinsère ligne par ligne pour ne perdre que les lignes en erreur
+            print(f"Erreur écriture lot de logs d'activité, reprise ligne par ligne: {e}")
             conn.rollback()
+            for row in rows:
+                try:
+                    with conn.cursor() as cursor:
+                        cursor.execute(insert_sql, row)
+                    conn.commit()
+                except Exception as e:
+                    print(f"Log d'activité ignoré {row[1]}: {e}")
+                    conn.rollback()
         finally:
-            cursor.close()
-            self.return_connection(conn)
+            self.return_connection(conn, close=broken)
+        return True
 
     def get_activity_logs(self, limit=100):
         """Récupère les logs d'activité"""
@@ -620,49 +803,64 @@ class DatabaseManager:
         try:
             stats = {}
             
-            cursor.execute("SELECT COUNT(*) FROM users")
-            stats['total_users'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM users WHERE is_active = true")
-            stats['active_users'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM users WHERE DATE(last_login) = CURRENT_DATE")
-            stats['today_logins'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM data_uploads")
-            stats['total_uploads'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM activity_logs WHERE DATE(created_at) = CURRENT_DATE")
-            stats['today_activities'] = cursor.fetchone()[0]
-            
-            cursor.execute("SELECT COUNT(*) FROM users WHERE is_first_login = true")
-            stats['first_login_users'] = cursor.fetchone()[0]
+            # Une seule requête : un parcours par table au lieu de dix allers-retours
+            cursor.execute("""
+                WITH u AS (
+                    SELECT 
+                        COUNT(*) AS total,
+                        COUNT(*) FILTER (WHERE is_active = true) AS active,
+                        COUNT(*) FILTER (WHERE DATE(last_login) = CURRENT_DATE) AS today_logins,
+                        COUNT(*) FILTER (WHERE is_first_login = true) AS first_login
+                    FROM users
+                ),
+                roles AS (
+                    SELECT role, COUNT(*) AS count
+                    FROM users
+                    GROUP BY role
+                ),
+                up AS (
+                    SELECT COUNT(*) AS total, SUM(file_size) AS total_size
+                    FROM data_uploads
+                ),
+                today AS (
+                    SELECT COUNT(*) AS activities, COUNT(DISTINCT user_id) AS active_users
+                    FROM activity_logs
+                    WHERE created_at >= CURRENT_DATE
+                      AND created_at < CURRENT_DATE + INTERVAL '1 day'
+                ),
+                weekly AS (
+                    SELECT DATE(created_at) AS date, COUNT(*) AS count
+                    FROM activity_logs
+                    WHERE created_at >= CURRENT_DATE - INTERVAL '7 days'
+                    GROUP BY DATE(created_at)
+                )
+                SELECT 
+                    u.total, u.active, u.today_logins, up.total, today.activities,
+                    u.first_login, up.total_size, today.active_users,
+                    (SELECT COALESCE(json_object_agg(role, count), '{}') FROM roles),
+                    (SELECT COALESCE(json_agg(json_build_array(date, count) ORDER BY date), '[]') FROM weekly)
+                FROM u, up, today
+            """)
+            row = cursor.fetchone()
             
-            cursor.execute("SELECT role, COUNT(*) FROM users GROUP BY role")
-            stats['users_by_role'] = dict(cursor.fetchall())
+            stats['total_users'] = row[0]
+            stats['active_users'] = row[1]
+            stats['today_logins'] = row[2]
+            stats['total_uploads'] = row[3]
+            stats['today_activities'] = row[4]
+            stats['first_login_users'] = row[5]
+            stats['users_by_role'] = row[8]
             
             # Statistiques dynamiques pour les dashboards
-            cursor.execute("SELECT SUM(file_size) FROM data_uploads WHERE file_size IS NOT NULL")
-            total_size = cursor.fetchone()[0] or 0
+            total_size = row[6] or 0
             stats['total_data_size_mb'] = round(total_size / (1024*1024), 2) if total_size > 0 else 0
+            stats['active_users_today'] = row[7]
             
-            cursor.execute("""
-                SELECT COUNT(DISTINCT user_id) 
-                FROM activity_logs 
-                WHERE DATE(created_at) = CURRENT_DATE
-            """)
-            stats['active_users_today'] = cursor.fetchone()[0]
-            
-            # Générer des données d'activité réelles des 7 derniers jours
-            cursor.execute("""
-                SELECT DATE(created_at) as date, COUNT(*) as count
-                FROM activity_logs
-                WHERE created_at >= CURRENT_DATE - INTERVAL '7 days'
-                GROUP BY DATE(created_at)
-                ORDER BY date
-            """)
-            activity_data = cursor.fetchall()
-            stats['weekly_activity'] = activity_data
+            # Activité réelle des 7 derniers jours
+            stats['weekly_activity'] = [
+                (datetime.strptime(date, '%Y-%m-%d').date(), count)
+                for date, count in row[9]
+            ]
             
             return stats
         except Exception as e:
@@ -823,18 +1021,22 @@ class DatabaseManager:
         
         cursor = conn.cursor()
         try:
-            cursor.execute("SELECT id FROM users WHERE username = %s", (username,))
-            if cursor.fetchone():
-                return False, "Ce nom d'utilisateur existe déjà"
-            
-            hashed = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+            hashed = self._hash_password(password)
             
+            # L'unicité du nom d'utilisateur est vérifiée par la contrainte UNIQUE (un seul aller-retour)
             cursor.execute("""
                 INSERT INTO users (username, full_name, email, password_hash, role, department, is_first_login)
                 VALUES (%s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (username) DO NOTHING
+                RETURNING id
             """, (username, full_name, email, hashed, role, department, True))
             
+            if cursor.fetchone() is None:
+                conn.rollback()
+                return False, "Ce nom d'utilisateur existe déjà"
+            
             conn.commit()
+            self._invalidate_user_cache(None)
             return True, f"Utilisateur {username} créé avec succès"
             
         except Exception as e:
@@ -845,10 +1047,15 @@ class DatabaseManager:
             self.return_connection(conn)
 
     def get_all_users(self):
-        """Récupère tous les utilisateurs"""
+        """Récupère tous les utilisateurs (cache mémoire avec expiration)"""
         if not self.connection_pool:
             return []
         
+        with self._user_cache_lock:
+            cached = self._all_users_cache
+        if cached and time.monotonic() - cached[0] < Config.USER_CACHE_TTL:
+            return [dict(user) for user in cached[1]]
+        
         conn = self.get_connection()
         if not conn:
             return []
@@ -861,8 +1068,10 @@ class DatabaseManager:
                 FROM users
                 ORDER BY username
             """)
-            users = cursor.fetchall()
-            return users
+            users = [dict(user) for user in cursor.fetchall()]
+            with self._user_cache_lock:
+                self._all_users_cache = (time.monotonic(), users)
+            return [dict(user) for user in users]
         except:
             return []
         finally:
@@ -870,10 +1079,20 @@ class DatabaseManager:
             self.return_connection(conn)
 
     def get_user_by_id(self, user_id):
-        """Récupère un utilisateur par son ID"""
+        """Récupère un utilisateur par son ID (cache mémoire avec expiration)"""
         if not self.connection_pool:
             return None
         
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return None
+        
+        with self._user_cache_lock:
+            cached = self._user_cache.get(user_id)
+        if cached and time.monotonic() - cached[0] < Config.USER_CACHE_TTL:
+            return dict(cached[1])
+        
         conn = self.get_connection()
         if not conn:
             return None
@@ -886,6 +1105,13 @@ class DatabaseManager:
                 FROM users WHERE id = %s
             """, (user_id,))
             user = cursor.fetchone()
+            if user:
+                user = dict(user)
+                with self._user_cache_lock:
+                    if len(self._user_cache) >= Config.USER_CACHE_MAX:
+                        self._user_cache.clear()
+                    self._user_cache[user_id] = (time.monotonic(), user)
+                return dict(user)
             return user
         except:
             return None
@@ -893,6 +1119,17 @@ class DatabaseManager:
             cursor.close()
             self.return_connection(conn)
 
+    def _invalidate_user_cache(self, user_id):
+        """Retire un utilisateur du cache après modification (la liste complète est aussi invalidée)"""
+        with self._user_cache_lock:
+            self._all_users_cache = None
+        try:
+            user_id = int(user_id)
+        except (TypeError, ValueError):
+            return
+        with self._user_cache_lock:
+            self._user_cache.pop(user_id, None)
+
     def update_user_status(self, user_id, is_active):
         """Met à jour le statut d'un utilisateur"""
         if not self.connection_pool:
@@ -906,6 +1143,7 @@ class DatabaseManager:
         try:
             cursor.execute("UPDATE users SET is_active = %s WHERE id = %s", (is_active, user_id))
             conn.commit()
+            self._invalidate_user_cache(user_id)
             return cursor.rowcount > 0
         except:
             conn.rollback()
@@ -1140,20 +1378,30 @@ class DatabaseManager:
                 campaigns = ['Summer Sale', 'Black Friday', 'Christmas Campaign', 'New Year Promotion']
                 today = datetime.now().date()
                 
-                for i in range(30):
-                    date = today - timedelta(days=i)
-                    for campaign in campaigns:
-                        impressions = np.random.randint(1000, 10000)
-                        clicks = int(impressions * np.random.uniform(0.01, 0.05))
-                        conversions = int(clicks * np.random.uniform(0.02, 0.10))
-                        spend = round(np.random.uniform(100, 5000), 2)
-                        revenue = round(spend * np.random.uniform(1.2, 3.0), 2)
-                        
-                        cursor.execute("""
-                            INSERT INTO marketing_data 
-                            (campaign_name, impressions, clicks, conversions, spend, revenue, date)
-                            VALUES (%s, %s, %s, %s, %s, %s, %s)
-                        """, (campaign, impressions, clicks, conversions, spend, revenue, date))
+                keys = [(campaign, today - timedelta(days=i)) for i in range(30) for campaign in campaigns]
+                n = len(keys)
+                
+                # Tirages aléatoires groupés pour toutes les lignes
+                rng = np.random.default_rng()
+                impressions = rng.integers(1000, 10000, n)
+                clicks = (impressions * rng.uniform(0.01, 0.05, n)).astype(int)
+                conversions = (clicks * rng.uniform(0.02, 0.10, n)).astype(int)
+                spend = np.round(rng.uniform(100, 5000, n), 2)
+                revenue = np.round(spend * rng.uniform(1.2, 3.0, n), 2)
+                
+                rows = [
+                    (campaign, imp, clk, conv, spd, rev, date)
+                    for (campaign, date), imp, clk, conv, spd, rev in zip(
+                        keys, impressions.tolist(), clicks.tolist(), conversions.tolist(),
+                        spend.tolist(), revenue.tolist()
+                    )
+                ]
+                
+                cursor.executemany("""
+                    INSERT INTO marketing_data 
+                    (campaign_name, impressions, clicks, conversions, spend, revenue, date)
+                    VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """, rows)
                 
                 conn.commit()
                 return True
@@ -1458,10 +1706,9 @@ def render_login_page(db):
                         
                         if user.get('is_first_login', False):
                             st.session_state.force_password_change = True
-                            st.success("Connexion réussie! Vous devez changer votre mot de passe.")
+                            st.toast("Connexion réussie! Vous devez changer votre mot de passe.", icon="✅")
                         else:
-                            st.success("Connexion réussie!")
-                        time.sleep(1)
+                            st.toast("Connexion réussie!", icon="✅")
                         st.rerun()
                     else:
                         st.error("Identifiants incorrects")
@@ -1514,9 +1761,8 @@ def render_password_change_page(user, db):
                     if db.update_user_password(user['id'], new_password):
                         st.session_state.user['is_first_login'] = False
                         st.session_state.force_password_change = False
-                        st.success("Mot de passe mis à jour avec succès!")
+                        st.toast("Mot de passe mis à jour avec succès!", icon="✅")
                         db.log_activity(user['id'], "password_change", "Mot de passe modifié")
-                        time.sleep(2)
                         st.rerun()
                     else:
                         st.error("Erreur lors de la mise à jour")
@@ -1874,8 +2120,7 @@ def render_user_management_enhanced(user, db):
                         if success:
                             db.log_activity(user['id'], "user_status_change", 
                                            f"Statut {selected_username_status} changé à {new_status}")
-                            st.success(f"Statut de {selected_username_status} mis à jour")
-                            time.sleep(1)
+                            st.toast(f"Statut de {selected_username_status} mis à jour", icon="✅")
                             st.rerun()
                         else:
                             st.error("Erreur lors de la mise à jour")
@@ -1943,8 +2188,7 @@ def render_user_management_enhanced(user, db):
                                     if success:
                                         db.log_activity(user['id'], "user_deletion", 
                                                        f"Suppression utilisateur {selected_username_delete}")
-                                        st.success(f"Utilisateur {selected_username_delete} supprimé avec succès")
-                                        time.sleep(2)
+                                        st.toast(f"Utilisateur {selected_username_delete} supprimé avec succès", icon="✅")
                                         st.rerun()
                                     else:
                                         st.error(f"Erreur : {message}")
@@ -2301,14 +2545,13 @@ def render_user_profile_enhanced(user, db):
                     
                     if success:
                         db.log_activity(user['id'], "profile_update", "Mise à jour du profil")
-                        st.success("Profil mis à jour avec succès!")
+                        st.toast("Profil mis à jour avec succès!", icon="✅")
                         
                         # Mettre à jour la session
                         for key, value in updates.items():
                             if key != 'password':
                                 st.session_state.user[key] = value
                         
-                        time.sleep(1)
                         st.rerun()
                     else:
                         st.error("Erreur lors de la mise à jour")
@@ -2317,6 +2560,116 @@ def render_user_profile_enhanced(user, db):
         
         st.markdown('</div>', unsafe_allow_html=True)
 
+# =======================================
+#       IMPORT DES FICHIERS DE DONNÉES
+# =======================================
+@st.cache_data(show_spinner=False, max_entries=8)
+def load_uploaded_dataframe(file_bytes, filename):
+    """Lit un fichier importé (CSV, Excel, JSON) en DataFrame.
+
+    Le résultat est mis en cache sur le contenu du fichier : le fichier reste
+    dans le file_uploader et Streamlit relance le script à chaque interaction,
+    sans ce cache il serait relu entièrement à chaque clic.
+    """
+    name = filename.lower()
+    buffer = io.BytesIO(file_bytes)
+
+    if name.endswith('.csv'):
+        df = pd.read_csv(buffer)
+    elif name.endswith('.xlsx'):
+        df = pd.read_excel(buffer, engine='openpyxl')
+    elif name.endswith('.xls'):
+        df = pd.read_excel(buffer)
+    elif name.endswith('.json'):
+        df = lire_json(file_bytes)
+    else:
+        return None
+    return reduire_entiers(df)
+
+# Colonnes que pd.read_json convertit en dates d'après leur nom
+_JSON_DATE_COL_RE = re.compile(r'(_at|_time)$|^timestamp|^(modified|date|datetime)$')
+
+def lire_json(file_bytes):
+    """Lit un JSON en DataFrame, avec orjson pour une liste d'enregistrements.
+
+    orjson + from_records évite le parseur de pd.read_json, nettement plus lent.
+    Les colonnes de dates (mêmes noms que pour read_json) sont converties ;
+    les autres formats JSON passent par pd.read_json.
+    """
+    if ORJSON_AVAILABLE:
+        records = orjson.loads(file_bytes)
+        if isinstance(records, list) and records and isinstance(records[0], dict):
+            df = pd.DataFrame.from_records(records)
+            for col in df.columns:
+                if df[col].dtype == 'object' and _JSON_DATE_COL_RE.search(str(col).lower()):
+                    try:
+                        df[col] = pd.to_datetime(df[col])
+                    except (ValueError, TypeError):
+                        pass
+            return df
+    return pd.read_json(io.BytesIO(file_bytes))
+
+# Marge gardée sous la limite int32 : |valeur| < 2**15, si bien que le produit de deux
+# valeurs, ou la somme de 65 536 d'entre elles, tient encore dans un int32
+_INT32_HEADROOM = 2**31 // 2**16
+
+def reduire_entiers(df):
+    """Passe en int32 les colonnes int64 dont toutes les valeurs restent sous |2**15|.
+
+    Divise par deux la mémoire de ces colonnes pour les agrégations qui suivent.
+    Ne pas se contenter de « la valeur tient dans un int32 » : les différences,
+    produits et cumuls faits ensuite (et .sum() là où l'entier numpy par défaut est
+    sur 32 bits) déborderaient sans avertissement. Au-delà de cette marge la colonne
+    reste en int64 ; les flottants restent en float64 (float32 perdrait des décimales
+    sur les montants).
+    """
+    for col in df.select_dtypes(include=['int64']).columns:
+        valeurs = df[col]
+        if len(valeurs) and valeurs.min() > -_INT32_HEADROOM and valeurs.max() < _INT32_HEADROOM:
+            df[col] = valeurs.astype(np.int32)
+    return df
+
+def resume_colonnes(df):
+    """Type, valeurs uniques et valeurs manquantes par colonne.
+
+    Volontairement sans st.cache_data : pour les grands DataFrames, Streamlit ne
+    hache qu'un échantillon de lignes, et un remplacement des valeurs manquantes
+    fait sur place laisserait afficher des comptes périmés.
+    """
+    return pd.DataFrame({
+        'Colonne': df.columns,
+        'Type': df.dtypes.astype(str),
+        'Valeurs uniques': df.nunique().values,
+        'Valeurs manquantes': df.isnull().sum().values
+    })
+
+# =======================================
+#       OUTILS D'ANALYSE DE TEXTE
+# =======================================
+# Mots-clés de détection automatique des colonnes (une seule regex par type de colonne)
+_AUTHOR_COL_RE = re.compile('|'.join(map(re.escape, ['author', 'user', 'name', 'client', 'utilisateur'])))
+_RATING_COL_RE = re.compile('|'.join(map(re.escape, ['rating', 'note', 'score', 'star', 'review'])))
+_DATE_COL_RE = re.compile('|'.join(map(re.escape, ['date', 'time', 'created', 'posted'])))
+
+def part_mot_dominant(series):
+    """Part (0 à 1) du mot le plus fréquent dans chaque texte de la colonne.
+
+    Équivaut à Counter(text.split()).most_common(1) ligne par ligne, mais en un
+    seul groupby sur les mots éclatés. Les valeurs non textuelles ou vides valent 0.
+    """
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return np.zeros(len(series))
+
+    mots = pd.Series(series.to_numpy(dtype=object)).str.split().explode().dropna()
+    if mots.empty:
+        return np.zeros(len(series))
+
+    occurrences = mots.groupby([mots.index, mots.to_numpy()], sort=False).size()
+    max_par_texte = occurrences.groupby(level=0, sort=False).max()
+    nb_mots = mots.groupby(level=0, sort=False).size()
+    ratio = (max_par_texte / nb_mots).reindex(range(len(series)), fill_value=0.0)
+    return ratio.to_numpy()
+
 # =======================================
 #       DASHBOARD DATA ANALYST
 # =======================================
@@ -2358,24 +2711,20 @@ def dashboard_data_analyst(user, db):
             key="data_analyst_upload"
         )
         
-        if uploaded_file is not None:
+        if uploaded_file is not None and uploaded_file.size > Config.MAX_FILE_SIZE_MB * 1024 * 1024:
+            st.error(f"Fichier trop volumineux (maximum {Config.MAX_FILE_SIZE_MB} Mo)")
+        elif uploaded_file is not None:
             try:
                 # Détecter le type de fichier et le lire
-                if uploaded_file.name.endswith('.csv'):
-                    df = pd.read_csv(uploaded_file)
-                elif uploaded_file.name.endswith(('.xlsx', '.xls')):
-                    df = pd.read_excel(uploaded_file)
-                elif uploaded_file.name.endswith('.json'):
-                    df = pd.read_json(uploaded_file)
-                else:
+                df = load_uploaded_dataframe(uploaded_file.getvalue(), uploaded_file.name)
+                if df is None:
                     st.error("Format de fichier non supporté")
-                    df = None
-                
+
                 if df is not None:
                     # Stocker les données dans la session
                     st.session_state['uploaded_data'] = df
                     st.session_state['uploaded_filename'] = uploaded_file.name
-                    st.session_state['uploaded_file_size'] = len(uploaded_file.getvalue())
+                    st.session_state['uploaded_file_size'] = uploaded_file.size
                     
                     st.success(f"{uploaded_file.name} importé avec succès!")
                     st.info(f"{df.shape[0]} lignes × {df.shape[1]} colonnes")
@@ -2454,24 +2803,27 @@ def render_ml_models(user, db):
     possible_rating_cols = []
     possible_date_cols = []
     
+    # Échantillon pour estimer la longueur moyenne des textes sans parcourir tout le fichier
+    sample_df = df.sample(1000, random_state=0) if len(df) > 1000 else df
+    
     # Détection intelligente des colonnes
     for col in df.columns:
         col_lower = col.lower()
         
         # Colonnes de texte (avis)
-        if df[col].dtype == 'object' and df[col].str.len().mean() > 20:
+        if df[col].dtype == 'object' and sample_df[col].str.len().mean() > 20:
             text_cols.append(col)
         
         # Colonnes d'auteur
-        if any(keyword in col_lower for keyword in ['author', 'user', 'name', 'client', 'utilisateur']):
+        if _AUTHOR_COL_RE.search(col_lower):
             possible_author_cols.append(col)
         
         # Colonnes de note
-        if any(keyword in col_lower for keyword in ['rating', 'note', 'score', 'star', 'review']):
+        if _RATING_COL_RE.search(col_lower):
             possible_rating_cols.append(col)
         
         # Colonnes de date
-        if any(keyword in col_lower for keyword in ['date', 'time', 'created', 'posted']):
+        if _DATE_COL_RE.search(col_lower):
             possible_date_cols.append(col)
     
     # Sélection des colonnes
@@ -2587,20 +2939,11 @@ def render_ml_models(user, db):
             analysis_data = df.copy()
             
             # Appliquer les règles de base
-            analysis_data['text_length'] = analysis_data[review_col].astype(str).apply(len)
+            analysis_data['text_length'] = analysis_data[review_col].astype(str).str.len()
             analysis_data['suspicious_short'] = analysis_data['text_length'] < min_text_length
             
             # Détection de répétition
-            def check_repetition(text):
-                if isinstance(text, str) and len(text) > 0:
-                    words = text.split()
-                    if len(words) > 0:
-                        word_counts = Counter(words)
-                        most_common_count = word_counts.most_common(1)[0][1]
-                        return (most_common_count / len(words)) * 100 > max_repetition
-                return False
-            
-            analysis_data['suspicious_repetition'] = analysis_data[review_col].apply(check_repetition)
+            analysis_data['suspicious_repetition'] = part_mot_dominant(analysis_data[review_col]) * 100 > max_repetition
             
             # Détection notes extrêmes
             if rating_col != 'Aucune' and extreme_rating:
@@ -4338,12 +4681,7 @@ def render_eda_analysis(user, db):
         
         # Types de données
         st.markdown("#### Types de données")
-        dtype_info = pd.DataFrame({
-            'Colonne': df.columns,
-            'Type': df.dtypes.astype(str),
-            'Valeurs uniques': [df[col].nunique() for col in df.columns],
-            'Valeurs manquantes': df.isnull().sum().values
-        })
+        dtype_info = resume_colonnes(df)
         st.dataframe(dtype_info, use_container_width=True, height=400)
         
         # Statistiques descriptives
@@ -4895,7 +5233,7 @@ def render_sentiment_analysis(user, db):
                 
                 # Règles pour détecter les faux avis
                 # 1. Texte trop court
-                df_analysis['texte_longueur'] = df_analysis[text_column].astype(str).apply(len)
+                df_analysis['texte_longueur'] = df_analysis[text_column].astype(str).str.len()
                 df_analysis.loc[df_analysis['texte_longueur'] < 10, 'faux_avis'] = True
                 
                 # 2. Subjectivité très basse
@@ -4907,17 +5245,8 @@ def render_sentiment_analysis(user, db):
                     df_analysis.loc[(df_analysis[rating_col] == 5) & (df_analysis['texte_longueur'] < 20), 'faux_avis'] = True
                     df_analysis.loc[(df_analysis[rating_col] == 1) & (df_analysis['texte_longueur'] < 20), 'faux_avis'] = True
                 
-                # 4. Répétition excessive de mots
-                def check_repetition(text):
-                    if isinstance(text, str) and len(text) > 0:
-                        words = text.split()
-                        if len(words) > 0:
-                            word_counts = Counter(words)
-                            most_common_count = word_counts.most_common(1)[0][1]
-                            return most_common_count / len(words) > 0.3  # Si un mot représente >30% du texte
-                    return False
-                
-                df_analysis['repetition_excessive'] = df_analysis[text_column].apply(check_repetition)
+                # 4. Répétition excessive de mots (un mot représente >30% du texte)
+                df_analysis['repetition_excessive'] = part_mot_dominant(df_analysis[text_column]) > 0.3
                 df_analysis.loc[df_analysis['repetition_excessive'], 'faux_avis'] = True
                 
                 # Stocker les résultats dans la session
@@ -5453,12 +5782,7 @@ def render_analyst_overview(user, db):
                 
                 # Afficher les types de données
                 with st.expander("Types de données par colonne", expanded=False):
-                    type_info = pd.DataFrame({
-                        'Colonne': df.columns,
-                        'Type': df.dtypes.astype(str),
-                        'Valeurs manquantes': df.isnull().sum().values,
-                        'Valeurs uniques': [df[col].nunique() for col in df.columns]
-                    })
+                    type_info = resume_colonnes(df)[['Colonne', 'Type', 'Valeurs manquantes', 'Valeurs uniques']]
                     st.dataframe(type_info, use_container_width=True, height=400)
         else:
             upload_activity = metrics.get('upload_activity', [])
@@ -6457,17 +6781,16 @@ def dashboard_marketing(user, db):
             help="Importez vos données clients, campagnes, avis, etc."
         )
         
-        if marketing_file is not None:
+        if marketing_file is not None and marketing_file.size > Config.MAX_FILE_SIZE_MB * 1024 * 1024:
+            st.error(f"Fichier trop volumineux (maximum {Config.MAX_FILE_SIZE_MB} Mo)")
+        elif marketing_file is not None:
             try:
-                if marketing_file.name.endswith('.csv'):
-                    marketing_df = pd.read_csv(marketing_file)
-                else:
-                    marketing_df = pd.read_excel(marketing_file)
-                
+                marketing_df = load_uploaded_dataframe(marketing_file.getvalue(), marketing_file.name)
+
                 # Stocker les données
                 st.session_state['marketing_data'] = marketing_df
                 st.session_state['marketing_filename'] = marketing_file.name
-                st.session_state['marketing_file_size'] = len(marketing_file.getvalue())
+                st.session_state['marketing_file_size'] = marketing_file.size
                 
                 st.success(f"{marketing_file.name} importé!")
                 st.info(f"{marketing_df.shape[0]} lignes × {marketing_df.shape[1]} colonnes")
@@ -6828,17 +7151,13 @@ def render_sentiment_analysis_marketing(user, db):
             # Ajouter une colonne pour l'intensité du sentiment
             df_results['intensite_sentiment'] = df_results['polarite'].abs()
             
-            # Classification par intensité
-            def classify_intensity(polarity):
-                abs_pol = abs(polarity)
-                if abs_pol < 0.3:
-                    return 'faible'
-                elif abs_pol < 0.6:
-                    return 'modéré'
-                else:
-                    return 'fort'
-            
-            df_results['intensite'] = df_results['polarite'].apply(classify_intensity)
+            # Classification par intensité (vectorisée sur toute la colonne)
+            intensite = df_results['intensite_sentiment']
+            df_results['intensite'] = np.select(
+                [intensite < 0.3, intensite < 0.6],
+                ['faible', 'modéré'],
+                default='fort'
+            )
             
             # Stocker les résultats dans la session
             st.session_state['sentiment_results'] = df_results
@@ -7222,21 +7541,11 @@ def render_fake_reviews_detection_marketing(user, db):
             analysis_df = df.copy()
             
             # 1. Détection par longueur
-            analysis_df['text_length'] = analysis_df[text_column].astype(str).apply(len)
+            analysis_df['text_length'] = analysis_df[text_column].astype(str).str.len()
             analysis_df['suspicious_length'] = analysis_df['text_length'] < min_length
             
             # 2. Détection par répétition
-            def check_repetition(text):
-                if isinstance(text, str) and len(text) > 0:
-                    words = text.split()
-                    if len(words) > 0:
-                        word_counts = Counter(words)
-                        most_common_count = word_counts.most_common(1)[0][1]
-                        repetition_percentage = (most_common_count / len(words)) * 100
-                        return repetition_percentage > repetition_threshold
-                return False
-            
-            analysis_df['suspicious_repetition'] = analysis_df[text_column].apply(check_repetition)
+            analysis_df['suspicious_repetition'] = part_mot_dominant(analysis_df[text_column]) * 100 > repetition_threshold
             
             # 3. Détection par note extrême
             analysis_df['suspicious_rating'] = False
@@ -7691,7 +8000,7 @@ def render_marketing_ai_recommendations(user, db):
                             spam_keywords = ['spam', 'fake', 'faux', 'fraud', 'suspect', 'bot']
                             for text_col in text_cols[:1]:  # Prendre la première colonne de texte
                                 # Vérifier la longueur du texte
-                                fake_review_df['text_length'] = fake_review_df[text_col].astype(str).apply(len)
+                                fake_review_df['text_length'] = fake_review_df[text_col].astype(str).str.len()
                                 
                                 # Marquer comme "à vérifier" les textes courts
                                 fake_review_df.loc[fake_review_df['text_length'] < 20, 'statut_analyse'] = 'à_vérifier'
@@ -0,0 +1,37 @@
+# tests/test_utils.py
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pd = pytest.importorskip("pandas")
+np = pytest.importorskip("numpy")
+utils = pytest.importorskip("utils")
+
+COLONNES = {
+    "mixte": ["Produit excellent, super", "horrible et décevant", "", "   ", None,
+              np.nan, 42, 3.5, "bon mais nul", "rien à dire"],
+    "numerique": [1, 2, 3, 4.5],
+    "vide": [np.nan, np.nan, np.nan],
+    "aucune_ligne": [],
+}
+
+
+@pytest.mark.parametrize("avec_vader", [True, False])
+@pytest.mark.parametrize("nom", sorted(COLONNES))
+def test_analyser_sentiment_vectorized_identique(monkeypatch, nom, avec_vader):
+    """La version colonne donne le même résultat que apply(analyser_sentiment)"""
+    if not avec_vader:
+        monkeypatch.setattr(utils, "sia", None)
+    elif utils.sia is None:
+        pytest.skip("lexique VADER indisponible")
+
+    series = pd.Series(COLONNES[nom], index=range(10, 10 + len(COLONNES[nom])))
+    attendu = series.apply(utils.analyser_sentiment)
+
+    resultat = utils.analyser_sentiment_vectorized(series)
+
+    assert resultat.index.equals(series.index)
+    assert resultat.tolist() == attendu.tolist()
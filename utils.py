@@ -4,6 +4,8 @@ import numpy as np
 import hashlib
 import json
 import os
+import copy
+import functools
 import uuid
 import re
 import plotly.express as px
@@ -15,9 +17,20 @@ import warnings
 import nltk
 warnings.filterwarnings('ignore')
 
+# Sérialisation JSON rapide si orjson est installé
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 # ==================== CONFIGURATION ====================
 AIM_CONFIG_FILE = "aim_config.json"
 USERS_FILE = "users.json"
+JSON_IO_BUFFER_SIZE = 65536  # un seul appel système read()/write() pour la configuration
+
+# Configuration AIM déjà lue, invalidée quand la date de modification du fichier change
+_AIM_CONFIG_CACHE = {"mtime": None, "data": None}
 
 # Télécharger les ressources NLTK
 try:
@@ -28,6 +41,18 @@ except:
     sia = None
 
 # ==================== CONFIGURATION AIM ====================
+def _json_loads(raw):
+    """Décode un contenu JSON (bytes)"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(raw)
+    return json.loads(raw.decode('utf-8'))
+
+def _json_dumps(obj):
+    """Encode en JSON indenté (bytes UTF-8)"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, indent=4, ensure_ascii=False).encode('utf-8')
+
 def load_aim_config():
     """Charge la configuration AIM depuis un fichier JSON"""
     default_config = {
@@ -55,35 +80,53 @@ def load_aim_config():
         }
     }
     
-    if os.path.exists(AIM_CONFIG_FILE):
+    try:
+        mtime = os.stat(AIM_CONFIG_FILE).st_mtime_ns
+    except OSError:
+        return default_config
+    
+    if mtime != _AIM_CONFIG_CACHE["mtime"]:
         try:
-            with open(AIM_CONFIG_FILE, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(AIM_CONFIG_FILE, 'rb', buffering=JSON_IO_BUFFER_SIZE) as f:
+                data = _json_loads(f.read())
         except:
             return default_config
-    return default_config
+        _AIM_CONFIG_CACHE["mtime"] = mtime
+        _AIM_CONFIG_CACHE["data"] = data
+    
+    # Copie : l'appelant peut modifier la configuration sans altérer le cache
+    return copy.deepcopy(_AIM_CONFIG_CACHE["data"])
 
 def save_aim_config(config):
-    """Sauvegarde la configuration AIM"""
-    with open(AIM_CONFIG_FILE, 'w', encoding='utf-8') as f:
-        json.dump(config, f, indent=4, ensure_ascii=False)
+    """Sauvegarde la configuration AIM (écriture atomique)"""
+    # Fichier temporaire dans le même dossier puis renommage : jamais de fichier à moitié écrit
+    tmp_file = AIM_CONFIG_FILE + ".tmp"
+    with open(tmp_file, 'wb', buffering=JSON_IO_BUFFER_SIZE) as f:
+        f.write(_json_dumps(config))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, AIM_CONFIG_FILE)
+    
+    # Le cache reprend directement la configuration écrite (pas de relecture)
+    _AIM_CONFIG_CACHE["mtime"] = os.stat(AIM_CONFIG_FILE).st_mtime_ns
+    _AIM_CONFIG_CACHE["data"] = copy.deepcopy(config)
 
 # ==================== FONCTIONS AIM ====================
+MOTIFS_FAUX_AVIS = [
+    r'trop.*bon', r'incroyable.*produit', r'meilleur.*achat',
+    r'parfait.*.*parfait', r'excellent.*.*excellent',
+    r'sans.*faute', r'absolument.*parfait'
+]
+
 def detecter_faux_avis(texte, seuil=0.7):
     """Détecte les faux avis basés sur des motifs communs"""
     if not isinstance(texte, str):
         return False
     
-    motifs_faux_avis = [
-        r'trop.*bon', r'incroyable.*produit', r'meilleur.*achat',
-        r'parfait.*.*parfait', r'excellent.*.*excellent',
-        r'sans.*faute', r'absolument.*parfait'
-    ]
-    
     score = 0
     texte_lower = texte.lower()
     
-    for motif in motifs_faux_avis:
+    for motif in MOTIFS_FAUX_AVIS:
         if re.search(motif, texte_lower):
             score += 0.2
     
@@ -99,6 +142,31 @@ def detecter_faux_avis(texte, seuil=0.7):
     
     return score > seuil
 
+def detecter_faux_avis_vectorized(series, seuil=0.7):
+    """Version colonne de detecter_faux_avis (même résultat que series.apply(lambda x: detecter_faux_avis(str(x))))"""
+    textes = series.astype(str)
+    textes_lower = textes.str.lower()
+    
+    # Mêmes additions, dans le même ordre, que la version ligne par ligne
+    score = np.zeros(len(textes))
+    for motif in MOTIFS_FAUX_AVIS:
+        score += 0.2 * textes_lower.str.contains(motif, regex=True).to_numpy()
+    score += 0.3 * (textes.str.count(r'\S+') < 10).to_numpy()
+    
+    # TextBlob (coûteux) uniquement là où ses 0.2 points peuvent changer le verdict
+    indecis = (score <= seuil) & (score + 0.2 > seuil)
+    for i in np.flatnonzero(indecis):
+        try:
+            if abs(TextBlob(textes.iat[i]).sentiment.polarity) > 0.8:
+                score[i] += 0.2
+        except:
+            pass
+    
+    return pd.Series(score > seuil, index=series.index)
+
+MOTS_POSITIFS = ['bon', 'excellent', 'super', 'génial', 'parfait']
+MOTS_NEGATIFS = ['mauvais', 'nul', 'horrible', 'déçu', 'décevant']
+
 def analyser_sentiment(texte):
     """Analyse le sentiment d'un texte"""
     if not isinstance(texte, str) or not texte.strip():
@@ -113,12 +181,9 @@ def analyser_sentiment(texte):
         else:
             return "neutre"
     else:
-        positive_words = ['bon', 'excellent', 'super', 'génial', 'parfait']
-        negative_words = ['mauvais', 'nul', 'horrible', 'déçu', 'décevant']
-        
         texte_lower = texte.lower()
-        pos_count = sum(1 for word in positive_words if word in texte_lower)
-        neg_count = sum(1 for word in negative_words if word in texte_lower)
+        pos_count = sum(1 for word in MOTS_POSITIFS if word in texte_lower)
+        neg_count = sum(1 for word in MOTS_NEGATIFS if word in texte_lower)
         
         if pos_count > neg_count:
             return "positif"
@@ -127,6 +192,32 @@ def analyser_sentiment(texte):
         else:
             return "neutre"
 
+def analyser_sentiment_vectorized(series):
+    """Version colonne de analyser_sentiment (même résultat que series.apply(analyser_sentiment))"""
+    # Même garde que analyser_sentiment, élément par élément : une colonne numérique
+    # ou entièrement vide donne "neutre" partout au lieu de lever une erreur sur .str
+    valeurs = series.to_numpy(dtype=object)
+    valides = np.fromiter((isinstance(t, str) and bool(t.strip()) for t in valeurs),
+                          dtype=bool, count=len(valeurs))
+    textes = pd.Series(valeurs[valides], dtype=object)
+    
+    if sia:
+        compound = np.zeros(len(series))
+        compound[valides] = [sia.polarity_scores(t)['compound'] for t in textes]
+        conditions = [compound >= 0.05, compound <= -0.05]
+    else:
+        textes_lower = textes.str.lower()
+        pos_count = np.zeros(len(series), dtype=int)
+        neg_count = np.zeros(len(series), dtype=int)
+        for word in MOTS_POSITIFS:
+            pos_count[valides] += textes_lower.str.contains(word, regex=False).to_numpy(dtype=int)
+        for word in MOTS_NEGATIFS:
+            neg_count[valides] += textes_lower.str.contains(word, regex=False).to_numpy(dtype=int)
+        conditions = [pos_count > neg_count, neg_count > pos_count]
+    
+    conditions = [valides & condition for condition in conditions]
+    return pd.Series(np.select(conditions, ["positif", "négatif"], default="neutre"), index=series.index)
+
 def generer_recommandations(df, colonne_texte='avis'):
     """Génère des recommandations marketing basées sur les données"""
     if df is None or colonne_texte not in df.columns:
@@ -135,7 +226,7 @@ def generer_recommandations(df, colonne_texte='avis'):
     recommandations = []
     
     if 'sentiment' not in df.columns:
-        df['sentiment'] = df[colonne_texte].apply(analyser_sentiment)
+        df['sentiment'] = analyser_sentiment_vectorized(df[colonne_texte])
     
     total_avis = len(df)
     avis_positifs = (df['sentiment'] == 'positif').sum()
@@ -154,7 +245,7 @@ def generer_recommandations(df, colonne_texte='avis'):
         )
     
     if 'faux_avis' not in df.columns:
-        df['faux_avis'] = df[colonne_texte].apply(lambda x: detecter_faux_avis(str(x)))
+        df['faux_avis'] = detecter_faux_avis_vectorized(df[colonne_texte])
     
     faux_avis_count = df['faux_avis'].sum()
     if faux_avis_count > 0:
@@ -166,6 +257,7 @@ def generer_recommandations(df, colonne_texte='avis'):
     return recommandations
 
 # ==================== FONCTIONS VISUALISATION ====================
+@functools.lru_cache(maxsize=256)
 def create_kpi_card(title, value, color="#667eea", interpretation=""):
     """Crée une carte KPI stylisée avec interprétation"""
     card_html = f"""
@@ -236,8 +328,10 @@ def create_fake_review_analysis(data, text_col='avis'):
     visualizations = []
     interpretations = []
     
-    data['faux_avis'] = data[text_col].apply(lambda x: detecter_faux_avis(str(x)))
-    fake_count = data['faux_avis'].sum()
+    # Réutiliser la détection déjà faite (ex. par generer_recommandations)
+    if 'faux_avis' not in data.columns:
+        data['faux_avis'] = detecter_faux_avis_vectorized(data[text_col])
+    fake_count = int(data['faux_avis'].sum())
     total = len(data)
     
     fig1 = go.Figure(data=[go.Pie(
@@ -295,20 +389,21 @@ def create_bar_chart(data, column, title, top_n=10):
     
     return fig, interpretation
 
-def create_trend_chart(data, date_col='date', value_col=None):
-    """Crée un graphique de tendance temporelle"""
+def create_trend_chart(data, date_col='date', value_col=None, presorted=False):
+    """Crée un graphique de tendance temporelle (presorted=True si data est déjà trié par date)"""
     if data is None or date_col not in data.columns:
         return None, ""
     
     try:
-        data[date_col] = pd.to_datetime(data[date_col])
+        # Conversion locale : le DataFrame de l'appelant n'est pas modifié
+        dates = pd.to_datetime(data[date_col])
         
         if value_col:
-            daily_data = data.groupby(data[date_col].dt.date)[value_col].mean().reset_index()
+            daily_data = data.groupby(dates.dt.date, sort=not presorted)[value_col].mean().reset_index()
             title = f"Évolution de {value_col}"
             y_label = value_col
         else:
-            daily_data = data.groupby(data[date_col].dt.date).size().reset_index()
+            daily_data = data.groupby(dates.dt.date, sort=not presorted).size().reset_index()
             daily_data.columns = ['date', 'count']
             title = "Évolution du Volume"
             y_label = "Nombre"
@@ -329,8 +424,9 @@ def create_trend_chart(data, date_col='date', value_col=None):
         
         interpretation = ""
         if len(daily_data) > 1:
-            first_val = daily_data.iloc[0][daily_data.columns[1]]
-            last_val = daily_data.iloc[-1][daily_data.columns[1]]
+            values = daily_data[daily_data.columns[1]].values
+            first_val = values[0]
+            last_val = values[-1]
             change = ((last_val - first_val) / first_val * 100) if first_val != 0 else 0
             
             if change > 10: